@@ -1,9 +1,18 @@
+import os
 import shutil
 from pathlib import Path
 
 import kagglehub   # pip install kagglehub
 
 
+def _fast_copy(src, dst) -> None:
+    """Hard-link *src* to *dst*; fall back to a real copy across devices."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
 def download_dataset_to_subfolder(dataset_id: str, base_dir: Path = "data") -> Path:
     """
     Download a Kaggle dataset via kagglehub and copy it into
@@ -18,10 +27,11 @@ def download_dataset_to_subfolder(dataset_id: str, base_dir: Path = "data") -> P
     slug = dataset_id.split("/")[-1]
     target_dir = base_dir / slug
 
-    # Wipe & recreate subfolder
-    if target_dir.exists():
+    # Already populated → nothing to fetch. An empty folder (left behind by
+    # an interrupted download) is filled again instead of being trusted.
+    if target_dir.exists() and any(target_dir.iterdir()):
         return target_dir
-    target_dir.mkdir(parents=True)
+    target_dir.mkdir(parents=True, exist_ok=True)
 
     # Download into KaggleHub's local cache; returns that cache path
     downloaded = kagglehub.dataset_download(dataset_id)
@@ -30,15 +40,16 @@ def download_dataset_to_subfolder(dataset_id: str, base_dir: Path = "data") -> P
     if not src.exists():
         raise FileNotFoundError(f"Downloaded path not found: {src}")
 
-    # Copy files (or single file) into our target_dir
+    # Link (or copy) files into our target_dir – the KaggleHub cache is
+    # read-only for us, so hard links avoid duplicating the dataset
     if src.is_dir():
         for item in src.iterdir():
             dst = target_dir / item.name
             if item.is_dir():
-                shutil.copytree(item, dst)
+                shutil.copytree(item, dst, copy_function=_fast_copy)
             else:
-                shutil.copy2(item, dst)
+                _fast_copy(item, dst)
     else:  # single file
-        shutil.copy2(src, target_dir / src.name)
+        _fast_copy(src, target_dir / src.name)
 
     return target_dir
@@ -1,32 +1,45 @@
+from functools import lru_cache
 from pathlib import Path
-import os, tempfile
+from typing import Iterator, Sequence
+import io, os, wave
 # import sounddevice as sd, soundfile as sf
 
 import numpy as np
-from groq import Groq
 from dotenv import load_dotenv
 
 # ---------------------------------------------------------------------------
 # env + client
 # ---------------------------------------------------------------------------
 load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env", override=False)
-_client = Groq()  # picks up GROQ_API_KEY
+
+
+@lru_cache(maxsize=1)
+def _client():
+    """
+    Groq client, created on first use (from a worker thread) so that app
+    start-up neither imports the SDK nor needs GROQ_API_KEY yet.
+    """
+    from groq import Groq
+    return Groq()  # picks up GROQ_API_KEY
+
 
 CHAT_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 STT_MODEL = os.getenv("GROQ_STT_MODEL", "distil-whisper-large-v3-en")
+# cheaper/faster model for the live partial transcripts while recording
+STT_PARTIAL_MODEL = os.getenv("GROQ_STT_PARTIAL_MODEL", "whisper-large-v3-turbo")
 
 
 # ---------------------------------------------------------------------------
 # Chat
 # ---------------------------------------------------------------------------
 def chat_groq(
-    messages: list[dict], temperature: float = 0.7, max_tokens: int = 512
+    messages: Sequence[dict], temperature: float = 0.7, max_tokens: int = 512
 ) -> str:
     """
     messages – OpenAI-style list[{"role": "...", "content": "..."}]
     returns assistant reply text
     """
-    resp = _client.chat.completions.create(
+    resp = _client().chat.completions.create(
         model=CHAT_MODEL,
         messages=messages,
         temperature=temperature,
@@ -35,34 +48,54 @@ def chat_groq(
     return resp.choices[0].message.content
 
 
+def stream_chat_groq(
+    messages: Sequence[dict], temperature: float = 0.7, max_tokens: int = 512
+) -> Iterator[str]:
+    """
+    Same as chat_groq, but yields the reply piece by piece as Groq
+    generates it (stream=True), so the UI can render from the first token.
+    """
+    stream = _client().chat.completions.create(
+        model=CHAT_MODEL,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+    )
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
 # ---------------------------------------------------------------------------
 # Speech-to-text
 # ---------------------------------------------------------------------------
-def transcribe_wav(path: str) -> str:
+def transcribe_wav_bytes(buf: bytes, model: str = STT_MODEL) -> str:
     """
-    Send an existing WAV file to Groq Whisper and return plain text.
+    Send an in-memory WAV to Groq Whisper and return plain text.
 
     Note: with response_format='text' the SDK already returns a bare string,
     *not* an object with .text – that caused your previous AttributeError.
     """
-    with open(path, "rb") as f:
-        resp = _client.audio.transcriptions.create(
-            file=f,
-            model=STT_MODEL,
-            response_format="text",
-            language="en",
-        )
+    resp = _client().audio.transcriptions.create(
+        file=("audio.wav", buf, "audio/wav"),
+        model=model,
+        response_format="text",
+        language="en",
+    )
     # `resp` IS the text because of response_format="text"
     return resp.strip()
 
 
 # --------------------------------------------------------------------------
-# Audio recorder — fixed for universal PySoundFile
+# Audio recorder — WAVs are built in memory, nothing touches disk
 # --------------------------------------------------------------------------
 class Recorder:
     """
     Collects mono int16 audio frames.  start() begins capture;
-    stop_and_save() stops and returns a temp WAV path.
+    snapshot() returns WAV bytes of the audio so far without stopping;
+    stop_and_bytes() stops and returns WAV bytes of the whole take.
     """
 
     def __init__(self, fs: int = 16_000):
@@ -86,8 +119,8 @@ class Recorder:
         # )
         self._stream.start()
 
-    def stop_and_save(self) -> str:
-        """Stops recording and returns path to a temp WAV file."""
+    def stop_and_bytes(self) -> bytes:
+        """Stops recording and returns the take as WAV bytes."""
         if self._stream:
             self._stream.stop()
             self._stream.close()
@@ -96,7 +129,19 @@ class Recorder:
         if not self._frames:  # safety net
             raise RuntimeError("No audio captured")
 
-        audio = np.concatenate(self._frames, axis=0)
-        tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-#        sf.write(tmp.name, audio, self.fs, subtype="PCM_16")  # single call
-        return tmp.name
+        return self._to_wav(self._frames)
+
+    def snapshot(self) -> bytes | None:
+        """WAV bytes of everything captured so far (None if nothing yet)."""
+        frames = list(self._frames)  # the audio callback keeps appending
+        return self._to_wav(frames) if frames else None
+
+    def _to_wav(self, frames: list[np.ndarray]) -> bytes:
+        audio = np.concatenate(frames, axis=0).astype(np.int16, copy=False)
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:  # 44-byte RIFF header + raw PCM
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.fs)
+            w.writeframes(audio.tobytes())
+        return buf.getvalue()
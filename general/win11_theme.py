@@ -9,11 +9,15 @@
 # Requirements: Windows 11 (build ≥ 22000), PySide6 ≥ 6.4
 # --------------------------------------------------------------------------
 import ctypes
+import logging
 import platform
+from functools import lru_cache
 
 from PySide6.QtGui import QPalette, QColor
 from PySide6.QtWidgets import QWidget
 
+log = logging.getLogger(__name__)
+
 
 # ──────────────────────────────────────────────────────────────────────────
 # ❶  Complete QPalette definitions (light & dark)
@@ -55,43 +59,27 @@ def _make_palette(colors: dict[str, str]) -> QPalette:
     return pal
 
 
-# ──────────────────────────────────────────────────────────────────────────
-# ❸  Public function
-# --------------------------------------------------------------------------
-def apply_win11_theme(
-        widget: QWidget,
-        *,
-        palette: str = "auto",     # "light" | "dark" | "auto"
-        acrylic: bool = True,
-) -> None:
-    """
-    Apply Windows-11-like palette, rounded-corner stylesheet and optional
-    Acrylic/Mica blur behind *widget* (usually the QMainWindow).
-    """
-
-    # Determine light/dark choice
-    if palette == "auto":
-        is_dark = _system_prefers_dark()
-    else:
-        is_dark = (palette.lower() == "dark")
+@lru_cache(maxsize=2)
+def _palette(is_dark: bool) -> QPalette:
+    # setPalette() copies, so one instance per mode can be handed out
+    return _make_palette(_DARK if is_dark else _LIGHT)
 
-    # ---- 1. Palette ------------------------------------------------------
-    pal = _make_palette(_DARK if is_dark else _LIGHT)
-    widget.setPalette(pal)
 
+# ──────────────────────────────────────────────────────────────────────────
+# ❷  Global stylesheet (for the whole app), built once per mode
+# --------------------------------------------------------------------------
+def _make_style(colors: dict[str, str]) -> str:
     # ─── derive a 50%‐alpha border color ──────────────────────────────
-    colors = _DARK if is_dark else _LIGHT
     raw_border = colors["BORDER"].lstrip("#")
     border_color = f"#80{raw_border}"  # 0x80 = 50% opacity
 
-    # ---- 2. Global stylesheet (for the whole app) -----------------------
     # Rounded corners + neutral spacing/fonts everywhere
     if platform.system() == "Windows":
         background = "transparent"
     else:
         background = "solid"
 
-    STYLE = f"""
+    return f"""
         /* make the entire window see‐through */
         * {{
             background: {background};
@@ -119,7 +107,37 @@ def apply_win11_theme(
             background-color: rgba(255,255,255,0.1);
         }}
     """
-    widget.setStyleSheet(STYLE)
+
+
+_STYLE_LIGHT = _make_style(_LIGHT)
+_STYLE_DARK  = _make_style(_DARK)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# ❸  Public function
+# --------------------------------------------------------------------------
+def apply_win11_theme(
+        widget: QWidget,
+        *,
+        palette: str = "auto",     # "light" | "dark" | "auto"
+        acrylic: bool = True,
+) -> None:
+    """
+    Apply Windows-11-like palette, rounded-corner stylesheet and optional
+    Acrylic/Mica blur behind *widget* (usually the QMainWindow).
+    """
+
+    # Determine light/dark choice
+    if palette == "auto":
+        is_dark = system_prefers_dark()
+    else:
+        is_dark = (palette.lower() == "dark")
+
+    # ---- 1. Palette ------------------------------------------------------
+    widget.setPalette(_palette(is_dark))
+
+    # ---- 2. Global stylesheet -------------------------------------------
+    widget.setStyleSheet(_STYLE_DARK if is_dark else _STYLE_LIGHT)
 
     # ---- 3. Acrylic / Mica blur behind the window -----------------------
     if acrylic and platform.system() == "Windows":
@@ -129,15 +147,20 @@ def apply_win11_theme(
 
             # apply blur to your main window:
             GlobalBlur(hwnd, Dark=is_dark, QWidget=widget)
-            print("[DEBUG] BlurWindow: acrylic blur applied")
+            log.debug("BlurWindow: acrylic blur applied")
         except ImportError:
-            print("[DEBUG] BlurWindow not installed—falling back to solid background")
+            log.debug("BlurWindow not installed—falling back to solid background")
 
 
 # ──────────────────────────────────────────────────────────────────────────
 # ❹  Detect Windows dark / light preference
 # --------------------------------------------------------------------------
-def _system_prefers_dark() -> bool:
+@lru_cache(maxsize=1)
+def system_prefers_dark() -> bool:
+    """
+    Cached registry lookup; call system_prefers_dark.cache_clear() when
+    Windows broadcasts a theme change (WM_SETTINGCHANGE "ImmersiveColorSet").
+    """
     if platform.system() != "Windows":
         return False
     try:
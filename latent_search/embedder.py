@@ -1,41 +1,97 @@
 # ── stdlib / third-party ──────────────────────────────────────────────
+from functools import lru_cache
 from pathlib import Path
-import os, numpy as np, onnxruntime as ort
+import os, threading, numpy as np, onnxruntime as ort
 from transformers import CLIPTokenizer
 from PIL import Image
 # import soundfile as sf
 import librosa
 
 # ── MODEL LOCATIONS ───────────────────────────────────────────────────
-FULL_BASE = Path(__file__).parent / "models" / "clip" / "clip_full_int8_qdq.onnx"
-FULL_CTX  = FULL_BASE.with_name(FULL_BASE.stem + "_ctx.onnx")
-QNN_DLL   = "QnnHtp.dll"
-
-def _load_full_session() -> ort.InferenceSession:
-    so = ort.SessionOptions()
-    if FULL_CTX.exists():
-        model_path   = FULL_CTX.as_posix()
+FULL_BASE  = Path(__file__).parent / "models" / "clip" / "clip_full_int8_qdq.onnx"
+# per-tower graphs (see model_preprocessing); preferred when present since
+# the full graph always runs both encoders
+TEXT_BASE  = FULL_BASE.with_name("clip_text_int8_qdq.onnx")
+IMAGE_BASE = FULL_BASE.with_name("clip_image_int8_qdq.onnx")
+QNN_DLL    = "QnnHtp.dll"
+# no NPU (other machines, CI): prefer the dynamically quantized CPU graphs
+# from export_clip_onnx_total_verbose.quantize_for_cpu when present
+HAS_QNN    = "QNNExecutionProvider" in ort.get_available_providers()
+
+def _ctx_path(base: Path) -> Path:
+    return base.with_name(base.stem + "_ctx.onnx")
+
+def _cpu_model(base: Path) -> Path:
+    """File the CPU provider runs for *base*: its `_int8` graph if exported, else *base*."""
+    cpu = base.with_name(base.name.replace("_int8_qdq", "_int8"))
+    return cpu if cpu.exists() else base
+
+def _has_model(base: Path) -> bool:
+    if not HAS_QNN:
+        return _cpu_model(base).exists()
+    return base.exists() or _ctx_path(base).exists()
+
+@lru_cache(maxsize=None)
+def _model_for(tower: Path) -> Path:
+    """The graph serving *tower*: its own if present, else FULL_BASE (checked once)."""
+    return tower if _has_model(tower) else FULL_BASE
+
+def model_id() -> str:
+    """
+    Names the graphs behind embed_text/embed_image. Vectors from different
+    graphs (split towers vs full, QDQ vs CPU INT8 calibration) must not be
+    scored against each other, so the index stores this and re-embeds on change.
+    """
+    bases = (_model_for(TEXT_BASE), _model_for(IMAGE_BASE))
+    return "+".join((b if HAS_QNN else _cpu_model(b)).name for b in bases)
+
+def _load_session(base: Path) -> ort.InferenceSession:
+    """
+    Open *base* on the QNN HTP backend. The first run compiles the graph
+    and writes `<stem>_ctx.onnx`; later runs load that context directly
+    and skip HTP graph lowering. Without QNN, runs the `_int8` CPU graph
+    if there is one, else *base*, on the CPU provider.
+    """
+    ctx = _ctx_path(base)
+    so  = ort.SessionOptions()
+    if not HAS_QNN:
+        model_path   = _cpu_model(base).as_posix()
+        providers    = ["CPUExecutionProvider"]
+        prov_options = [{}]
+    elif ctx.exists():
+        model_path   = ctx.as_posix()
         providers    = ["QNNExecutionProvider"]
         prov_options = [{"backend_path": QNN_DLL}]
     else:
-        model_path   = FULL_BASE.as_posix()
+        model_path   = base.as_posix()
         providers    = ["QNNExecutionProvider", "CPUExecutionProvider"]
         prov_options = [{"backend_path": QNN_DLL}, {}]
         so.add_session_config_entry("ep.context_enable",     "1")
         so.add_session_config_entry("ep.context_embed_mode", "1")
-        so.add_session_config_entry("ep.context_file_path",  FULL_CTX.as_posix())
-    return ort.InferenceSession(
+        so.add_session_config_entry("ep.context_file_path",  ctx.as_posix())
+    sess = ort.InferenceSession(
         model_path,
         sess_options    = so,
         providers       = providers,
         provider_options= prov_options
     )
-
-# one singleton for the full CLIP
-_SESSION = _load_full_session()
-
-print(f"🖼️ Image Session Inputs : {[(inp.name, inp.shape, inp.type) for inp in _SESSION.get_inputs()]}")
-print(f"🏷️ Image Session Outputs: {[(out.name, out.shape, out.type) for out in _SESSION.get_outputs()]}")
+    print(f"🖼️ Session Inputs  ({base.name}): {[(inp.name, inp.shape, inp.type) for inp in sess.get_inputs()]}")
+    print(f"🏷️ Session Outputs ({base.name}): {[(out.name, out.shape, out.type) for out in sess.get_outputs()]}")
+    return sess
+
+# one singleton per model, created on first use so that importing this
+# module does not load anything
+_SESSIONS: dict[Path, ort.InferenceSession] = {}
+_SESSION_LOCK = threading.Lock()
+
+def _session(base: Path) -> ort.InferenceSession:
+    sess = _SESSIONS.get(base)
+    if sess is None:
+        with _SESSION_LOCK:
+            sess = _SESSIONS.get(base)
+            if sess is None:
+                sess = _SESSIONS[base] = _load_session(base)
+    return sess
 
 # ── TOKENIZER (unchanged) ────────────────────────────────────────────
 TOKENIZER = CLIPTokenizer.from_pretrained(
@@ -49,7 +105,13 @@ TOKENIZER = CLIPTokenizer.from_pretrained(
 # print(f"🖼️ Image Session Inputs : {inputs}")
 # print(f"🏷️ Image Session Outputs: {outputs}")
 
-# ── L2 helper ─────────────────────────────────────────────────────────
+# ── DUMMY INPUTS ──────────────────────────────────────────────────────
+# The full CLIP graph needs all three inputs on every run; the unused
+# tower gets these shared zero buffers instead of fresh allocations.
+_DUMMY_IMG  = np.zeros((1, 3, 224, 224), dtype=np.float32)
+_DUMMY_IDS  = np.zeros((1, 77), dtype=np.int64)
+_DUMMY_MASK = np.zeros((1, 77), dtype=np.int64)
+
 # ── L2 helper ─────────────────────────────────────────────────────────
 def _l2(v: np.ndarray) -> np.ndarray:
     return v / (np.linalg.norm(v) + 1e-12)
@@ -57,8 +119,8 @@ def _l2(v: np.ndarray) -> np.ndarray:
 # ── TEXT EMBEDDING ────────────────────────────────────────────────────
 def embed_text(text: str) -> np.ndarray:
     """
-    Feeds only the text inputs into the full CLIP ONNX and grabs the
-    512-D text embedding (now at outputs[2]).
+    Runs the text tower (or, if only the full CLIP ONNX is available,
+    feeds it a dummy image) and returns the L2-normalised 512-D embedding.
     """
     toks = TOKENIZER(
         text,
@@ -69,16 +131,24 @@ def embed_text(text: str) -> np.ndarray:
     )
     input_ids      = toks["input_ids"].astype(np.int64)
     attention_mask = toks["attention_mask"].astype(np.int64)
-    # dummy image to satisfy the ONNX inputs
-    dummy_img = np.zeros((1, 3, 224, 224), dtype=np.float32)
+
+    if _model_for(TEXT_BASE) == TEXT_BASE:
+        outputs = _session(TEXT_BASE).run(
+            None,
+            {
+                "input_ids":      input_ids,
+                "attention_mask": attention_mask,
+            },
+        )
+        return _l2(outputs[0][0])
 
     # run everything and pick output index 2 (the pooled text_embeds)
-    outputs = _SESSION.run(
+    outputs = _session(FULL_BASE).run(
         None,
         {
             "input_ids":      input_ids,
             "attention_mask": attention_mask,
-            "pixel_values":   dummy_img,
+            "pixel_values":   _DUMMY_IMG,
         },
     )
     emb512 = outputs[2][0]   # outputs[2] has shape (1,512)
@@ -89,8 +159,8 @@ def embed_text(text: str) -> np.ndarray:
 # ── IMAGE EMBEDDING ───────────────────────────────────────────────────
 def embed_image(img) -> np.ndarray:
     """
-    Feeds only the image input into the full CLIP ONNX and grabs the
-    512-D image embedding (now at outputs[3]).
+    Runs the image tower (or, if only the full CLIP ONNX is available,
+    feeds it dummy text) and returns the L2-normalised 512-D embedding.
     """
     if isinstance(img, (str, Path)):
         img = Image.open(img)
@@ -100,16 +170,16 @@ def embed_image(img) -> np.ndarray:
     ) / 255.0
     arr = ((arr.transpose(2, 0, 1) - 0.5) / 0.5)[None]  # (1,3,224,224)
 
-    # dummy text inputs
-    dummy_ids  = np.zeros((1, 77), dtype=np.int64)
-    dummy_mask = np.zeros((1, 77), dtype=np.int64)
+    if _model_for(IMAGE_BASE) == IMAGE_BASE:
+        outputs = _session(IMAGE_BASE).run(None, {"pixel_values": arr})
+        return _l2(outputs[0][0])
 
-    outputs = _SESSION.run(
+    outputs = _session(FULL_BASE).run(
         None,
         {
             "pixel_values":   arr,
-            "input_ids":      dummy_ids,
-            "attention_mask": dummy_mask,
+            "input_ids":      _DUMMY_IDS,
+            "attention_mask": _DUMMY_MASK,
         },
     )
     emb512 = outputs[3][0]   # outputs[3] has shape (1,512)
@@ -1,62 +1,366 @@
 # indexer.py
 """
-Maintains an in-memory embedding matrix + filenames + raw text.
+Maintains an in-memory embedding matrix + filenames; raw text is kept
+on disk (texts.bin) and read back through mmap.
 """
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-import json, threading
+import hashlib, json, mmap, os, struct, threading
 import numpy as np
+from PIL import Image
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from PySide6.QtCore import Signal, QObject
 
-from latent_search.embedder import embed_text, embed_image, embed_audio
-from latent_search.text_extract_pdf import extract_texts_from_dir
+from latent_search.embedder import embed_text, embed_image, embed_audio, model_id
+from latent_search.text_extract_pdf import extract_text_from_pdf
 
 EMB_DIR      = Path("embeddings")
 EMB_NPY_PATH = EMB_DIR / "matrix.npy"
 EMB_META     = EMB_DIR / "files.json"
+EMB_LOG      = EMB_DIR / "index.log"   # changes since the last snapshot
+EMB_MODEL    = EMB_DIR / "model.txt"   # embedder.model_id() of the vectors
+TEXTS_BIN    = EMB_DIR / "texts.bin"   # raw text of all docs, utf-8, appended
+TEXTS_IDX    = EMB_DIR / "texts.idx.npy"  # (N, 2) int64 (offset, length) per path
+# a compaction in progress: the rewritten store and the spans into it
+TEXTS_NEW     = EMB_DIR / "texts.bin.new"
+TEXTS_IDX_NEW = EMB_DIR / "texts.idx.new.npy"
 EMBED_DIM = 512
+INITIAL_CAPACITY = 64
+READ_AHEAD = 32    # files read/parsed ahead of the embedding stage
+# pdfminer is pure Python and holds the GIL, so PDFs are parsed in worker
+# processes; half the cores leaves room for ORT and the GUI
+PDF_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+FLUSH_DELAY = 0.5  # seconds of watchdog quiet before re-indexing
+LOG_COMPACT_MIN = 1 << 20  # don't compact logs smaller than this
+TEXT_CACHE_SIZE = 256      # decoded texts kept for repeated search hits
+SNIPPET_BYTES = 200        # text returned per search hit
+HASH_PREFIX = 64 * 1024    # bytes hashed per file for change detection
+# .txt/.md bytes read per file: far more than CLIP's 77 tokens, and the
+# stored text only feeds search snippets
+MAX_TEXT_BYTES = 16 * 1024
+
+# Rows, spans and fingerprints are keyed by the path's as_posix() form.
+# Older snapshots/logs stored str(path) (backslashes on Windows); _key
+# normalises those on load so both spellings map to one row.
+def _key(p: str | Path) -> str:
+    return Path(p).as_posix()
+
+def _pdf_read(txt: str):
+    """_read_file result for extracted PDF text."""
+    return ("text", txt, txt) if txt.strip() else (None, None, None)
+
+# ── file fingerprints ────────────────────────────────────────────────
+# (size, mtime_ns, blake2b of the first HASH_PREFIX bytes as hex); an
+# unchanged size + mtime skips the hash, the hash catches touched/copied
+# files whose content did not change.
+def _hash_head(fp: Path) -> str:
+    with open(fp, "rb") as f:
+        return hashlib.blake2b(f.read(HASH_PREFIX), digest_size=16).hexdigest()
+
+def _fingerprint(fp: Path) -> tuple[int, int, str] | None:
+    """Fingerprint of *fp*, or None if it vanished/is unreadable."""
+    try:
+        st = fp.stat()
+        return st.st_size, st.st_mtime_ns, _hash_head(fp)
+    except OSError:
+        return None
+
+def _unchanged(fp: Path, old: tuple[int, int, str]) -> tuple[int, int, str] | None:
+    """Current fingerprint of *fp* if it still matches *old*, else None."""
+    try:
+        st = fp.stat()
+        if st.st_size != old[0]:
+            return None
+        if st.st_mtime_ns == old[1]:
+            return old
+        h = _hash_head(fp)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns, h) if h == old[2] else None
+
+# ── append-only change log ───────────────────────────────────────────
+# record = [op:u8][path_len:u16][path utf-8]
+#          + for ADD: [vec: EMBED_DIM×f32][text offset:i64][text length:i64]
+#                     [size:i64][mtime_ns:i64][hash:16B]
+# (ADD_V1 records from older logs lack the fingerprint and are still read)
+_REC_HEAD  = struct.Struct("<BH")
+_SPAN      = struct.Struct("<qq")
+_FPRINT    = struct.Struct("<qq16s")
+_OP_DEL, _OP_ADD_V1, _OP_ADD = 0, 1, 2
+_VEC_BYTES = EMBED_DIM * 4
+_NO_SPAN   = (-1, -1)
+
+def _log_record(op: int, path: str, vec: np.ndarray | None = None,
+                span: tuple[int, int] = _NO_SPAN,
+                meta: tuple[int, int, str] | None = None) -> bytes:
+    raw = path.encode()
+    rec = _REC_HEAD.pack(op, len(raw)) + raw
+    if op == _OP_ADD:
+        size, mtime_ns, h = meta
+        rec += (np.asarray(vec, dtype=np.float32).tobytes() + _SPAN.pack(*span)
+                + _FPRINT.pack(size, mtime_ns, bytes.fromhex(h)))
+    return rec
+
+def _read_log(path: Path):
+    """
+    Yield (op, path, vec|None, span|None, meta|None) records, with ADD_V1
+    reported as ADD without meta; stops at a torn trailing record.
+    """
+    data = path.read_bytes()
+    pos = 0
+    while pos + _REC_HEAD.size <= len(data):
+        op, n = _REC_HEAD.unpack_from(data, pos)
+        pos += _REC_HEAD.size
+        body = {_OP_ADD_V1: _VEC_BYTES + _SPAN.size,
+                _OP_ADD:    _VEC_BYTES + _SPAN.size + _FPRINT.size}.get(op, 0)
+        end = pos + n + body
+        if end > len(data):
+            break
+        p = data[pos:pos + n].decode()
+        vec = span = meta = None
+        if op != _OP_DEL:
+            vec  = np.frombuffer(data, np.float32, EMBED_DIM, pos + n).copy()
+            span = _SPAN.unpack_from(data, pos + n + _VEC_BYTES)
+            if op == _OP_ADD:
+                size, mtime_ns, h = _FPRINT.unpack_from(data, pos + n + _VEC_BYTES + _SPAN.size)
+                meta = (size, mtime_ns, h.hex())
+            op = _OP_ADD
+        yield op, p, vec, span, meta
+        pos = end
+
+# ── on-disk text store ───────────────────────────────────────────────
+class _TextStore:
+    """
+    Raw document text in one append-only file, read back through mmap so
+    the process never holds the whole corpus. Texts are addressed by
+    (offset, length) byte spans. get() is safe under a shared read lock;
+    add/compact/commit/close need exclusive access (FileIndexer.lock.write()).
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        # hot top-k hits skip the mmap slice + utf-8 decode; spans are
+        # immutable until commit(), which clears this
+        self.get = lru_cache(maxsize=TEXT_CACHE_SIZE)(self._get)
+        self._open()
+
+    def _open(self):
+        self._append = open(self.path, "ab")
+        self._append.seek(0, os.SEEK_END)
+        self._read = open(self.path, "rb")
+        self._map  = (None, 0)   # (mmap, mapped length), swapped as one
+        self._map_lock = threading.Lock()
+
+    def size(self) -> int:
+        return self._append.tell()
+
+    def add(self, txt: str) -> tuple[int, int]:
+        raw = txt.encode(errors="ignore")
+        off = self._append.tell()
+        self._append.write(raw)
+        self._append.flush()
+        return off, len(raw)
+
+    def _get(self, span: tuple[int, int]) -> str:
+        off, n = span
+        if n <= 0:
+            return ""
+        mm, mm_len = self._map
+        if off + n > mm_len:
+            mm, mm_len = self._remap(off + n)
+            if off + n > mm_len:
+                return ""  # span from a lost/truncated write
+        return mm[off:off + n].decode(errors="ignore")
+
+    def _remap(self, need: int):
+        # a concurrent reader may still be slicing the old map, so it is
+        # not closed here – it goes away with its last reference
+        with self._map_lock:
+            if self._map[1] < need:
+                size = os.fstat(self._read.fileno()).st_size
+                mm = mmap.mmap(self._read.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+                self._map = (mm, size)
+            return self._map
+
+    def compact(self, spans: dict[str, tuple[int, int]]) -> dict[str, tuple[int, int]]:
+        """
+        Write only the texts in *spans* to TEXTS_NEW and return their spans
+        there. The live file is untouched until commit().
+        """
+        new_spans, off = {}, 0
+        with open(TEXTS_NEW, "wb") as out:
+            for p, span in spans.items():
+                raw = self._get(span).encode()
+                out.write(raw)
+                new_spans[p] = (off, len(raw))
+                off += len(raw)
+            out.flush()
+            os.fsync(out.fileno())
+        return new_spans
+
+    def commit(self):
+        """Replace the live file with the one written by compact()."""
+        self.close()   # Windows won't replace a mapped/open file
+        os.replace(TEXTS_NEW, self.path)
+        self.get.cache_clear()
+        self._open()
+
+    def close(self):
+        mm, _ = self._map
+        if mm is not None:
+            mm.close()
+        self._map = (None, 0)
+        self._append.close()
+        self._read.close()
+
+def _recover_compaction():
+    """
+    Finish or undo a compaction that _persist did not get to complete.
+    TEXTS_IDX_NEW is written only after the rest of the snapshot, so its
+    presence means the snapshot already refers to the compacted store.
+    """
+    if TEXTS_IDX_NEW.exists():
+        if TEXTS_NEW.exists():
+            os.replace(TEXTS_NEW, TEXTS_BIN)
+        os.replace(TEXTS_IDX_NEW, TEXTS_IDX)
+    elif TEXTS_NEW.exists():
+        TEXTS_NEW.unlink()
+
+# ── matrix buffer ────────────────────────────────────────────────────
+def _aligned_rows(cap: int) -> np.ndarray:
+    """Uninitialised (cap, EMBED_DIM) float32 rows, C-contiguous and 64-byte aligned."""
+    n = cap * EMBED_DIM
+    buf = np.empty(n + 16, dtype=np.float32)
+    off = (-buf.ctypes.data) % 64 // 4
+    return buf[off:off + n].reshape(cap, EMBED_DIM)
+
+# ── query embeddings ─────────────────────────────────────────────────
+@lru_cache(maxsize=256)
+def _embed_query(query: str) -> np.ndarray:
+    """
+    Cached search-side embed_text; the result is shared between callers,
+    so it is returned read-only.
+    """
+    q = np.ascontiguousarray(embed_text(query), dtype=np.float32)
+    q.flags.writeable = False
+    return q
+
+# ── reader/writer lock ───────────────────────────────────────────────
+class _RWLock:
+    """
+    Shared read / exclusive write lock. Waiting writers block new readers,
+    so a steady stream of searches cannot starve index updates.
+    """
+    def __init__(self):
+        self._cond    = threading.Condition()
+        self._readers = 0
+        self._writer  = False
+        self._waiting = 0   # writers queued for the lock
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
 
 class IndexBuilt(QObject):
     ready = Signal()
 
 class FileIndexer(FileSystemEventHandler):
-    """Thread-safe index based on parallel lists + a dict of raw text."""
+    """Thread-safe index based on parallel lists + an on-disk text store."""
     def __init__(self, folder: Path):
         super().__init__()
         self.folder = folder
         self.paths  : list[str]          = []
-        self.matrix : np.ndarray         = np.empty((0, EMBED_DIM), dtype=np.float32)
-        self.texts  : dict[str, str]     = {}    # ← NEW: path → raw content
-        self.lock   = threading.Lock()
+        # preallocated rows; only matrix[:_size] is live (see _ensure_capacity)
+        self.matrix : np.ndarray         = _aligned_rows(INITIAL_CAPACITY)
+        self._size  : int                = 0
+        self._row   : dict[str, int]     = {}    # path → row in matrix/paths
+        self.lock   = _RWLock()   # searches read, index updates write
         EMB_DIR.mkdir(exist_ok=True)
+        # raw text lives on disk; only the (offset, length) spans are in RAM
+        _recover_compaction()
+        self._texts = _TextStore(TEXTS_BIN)
+        self._spans : dict[str, tuple[int, int]] = {}
+        self._meta  : dict[str, tuple[int, int, str]] = {}  # path → fingerprint
+        # watchdog paths waiting for the next batched flush
+        self._dirty       : set[Path]              = set()
+        self._dirty_lock  = threading.Lock()
+        self._flush_timer : threading.Timer | None = None
+        # flushes run one at a time, in the order they took their batch
+        self._flush_lock  = threading.Lock()
+        # read/parse stage of _embed_many; threads start on demand and are
+        # reused by every later flush
+        self._read_pool = ThreadPoolExecutor(max_workers=min(READ_AHEAD, os.cpu_count() or 1))
+        self._pdf_pool : ProcessPoolExecutor | None = None  # started on the first PDF
+        self._log_file       = None   # EMB_LOG, opened for append by _persist
+        self._snapshot_bytes = 0
+        # pay ORT session creation / weight prep now rather than on the first query
+        embed_text("warmup")
+        self._model = model_id()
         self._load_or_build()
         self._start_watcher()
 #        self.signal = IndexBuilt()
 
     # --------------- public API --------------------------------------------
     def search(self, query: str, k: int = 10):
-        q = embed_text(query)
-        with self.lock:
-            if self.matrix.size == 0:
+        # float32 + C-contiguous on both sides keeps the matmul on BLAS sgemv
+        q = _embed_query(query)
+        with self.lock.read():
+            if self._size == 0:
                 return []
-            sims = self.matrix @ q
-            best = np.argsort(-sims)[:k]
-            # ← return triples (score, path, content)
+            sims = np.dot(self.matrix[:self._size], q)
+            # O(N) top-k selection, then sort only the k winners
+            k = min(k, len(sims))
+            best = np.argpartition(-sims, k - 1)[:k]
+            best = best[np.argsort(-sims[best])]
+            # ← return triples (score, path, snippet); only the first
+            #   SNIPPET_BYTES of each text are read, never the whole doc
             results = []
             for i in best:
                 p = self.paths[i]
-                txt = self.texts.get(p, "")  # empty for images/audio
-                results.append((float(sims[i]), p, txt))
+                span = self._spans.get(p)
+                snippet = ""  # empty for images/audio
+                if span:
+                    off, n = span
+                    snippet = " ".join(self._texts.get((off, min(n, SNIPPET_BYTES))).split())
+                results.append((float(sims[i]), p, snippet))
             return results
 
     # --------------- build/rebuild -----------------------------------------
     def _load_or_build(self):
         """
         Load an existing index (if any), then update it to reflect
-        added/removed files under self.folder. Reuses embeddings
-        when possible, embeds only new files.
+        added/removed files under self.folder. Reuses embeddings of
+        files whose fingerprint is unchanged (or that were renamed),
+        embeds only new/changed files.
         """
         print("[Indexer] loading or updating index…")
 
@@ -64,83 +368,143 @@ class FileIndexer(FileSystemEventHandler):
         exts = {".txt", ".md", ".pdf",
                 ".png", ".jpg", ".jpeg", ".webp",
                 ".wav", ".mp3", ".flac"}
-        current = [str(p) for p in self.folder.rglob("*") if p.suffix.lower() in exts]
+        current = [p.as_posix() for p in self.folder.rglob("*") if p.suffix.lower() in exts]
         current.sort()
-
-        # 2) Load persisted index if it matches shape; build vec_map
-        vec_map = {}
-        if EMB_NPY_PATH.exists() and EMB_META.exists():
+        current_set = set(current)
+
+        # 2) Load persisted index if it matches shape; build vec_map.
+        #    The matrix is memory-mapped so only rows we reuse get paged in.
+        vec_map, span_map, meta_map = {}, {}, {}
+        old_mat = None
+        # vectors from other graphs are not comparable: drop them all
+        old_model = EMB_MODEL.read_text() if EMB_MODEL.exists() else None
+        same_model = old_model == self._model
+        if not same_model and EMB_NPY_PATH.exists():
+            print(f"[Indexer] embedding model changed ({old_model} -> {self._model}), re-embedding all files")
+        if same_model and EMB_NPY_PATH.exists() and EMB_META.exists():
             try:
-                old_mat  = np.load(EMB_NPY_PATH)
-                old_paths= json.loads(EMB_META.read_text())
+                old_mat  = np.load(EMB_NPY_PATH, mmap_mode="r")
+                entries  = json.loads(EMB_META.read_text())
+                # older indexes stored bare paths without a fingerprint
+                old_paths= [_key(e if isinstance(e, str) else e["path"]) for e in entries]
+                meta_map = {_key(e["path"]): (e["size"], e["mtime_ns"], e["h"])
+                            for e in entries if isinstance(e, dict) and "h" in e}
                 if old_mat.shape == (len(old_paths), EMBED_DIM):
                     vec_map = {path: old_mat[i] for i, path in enumerate(old_paths)}
+                    if TEXTS_IDX.exists():
+                        idx = np.load(TEXTS_IDX)
+                        if idx.shape == (len(old_paths), 2):
+                            span_map = {path: (int(o), int(n))
+                                        for path, (o, n) in zip(old_paths, idx) if o >= 0}
                 else:
                     print(f"[Indexer] persisted index shape {old_mat.shape} != ({len(old_paths)},{EMBED_DIM}), rebuilding entries")
             except Exception as e:
                 print("[Indexer] failed loading persisted index:", e)
+        # replay changes logged after that snapshot
+        if same_model and EMB_LOG.exists():
+            try:
+                for op, path, vec, span, meta in _read_log(EMB_LOG):
+                    path = _key(path)
+                    span_map.pop(path, None)
+                    meta_map.pop(path, None)
+                    if op == _OP_ADD:
+                        vec_map[path] = vec
+                        if span[0] >= 0:
+                            span_map[path] = span
+                        if meta is not None:
+                            meta_map[path] = meta
+                    else:
+                        vec_map.pop(path, None)
+            except Exception as e:
+                print("[Indexer] failed replaying index log:", e)
+
+        # 3) Reconstruct index, reusing old embeddings of unchanged files
+        new_paths, new_vecs, new_spans, new_meta = [], [], {}, {}
+        todo = []
+        text_exts = {".txt", ".md", ".pdf"}
+        def reuse(p, old_p, meta):
+            new_paths.append(p)
+            new_vecs.append(np.array(vec_map[old_p]))  # copy out of the mmap
+            if old_p in span_map:
+                new_spans[p] = span_map[old_p]
+            new_meta[p] = meta
 
-        # 3) Reconstruct index, reusing old embeddings where possible
-        new_paths, new_vecs, new_texts = [], [], {}
         for p in current:
-            if p in vec_map:
-                vec = vec_map[p]
-                # reload raw text for text/pdf
-                if Path(p).suffix.lower() in {".txt", ".md", ".pdf"}:
-                    try:
-                        new_texts[p] = Path(p).read_text(errors="ignore")
-                    except:
-                        new_texts[p] = ""
-            else:
-                vec, txt = self._embed_file(Path(p))
-                if vec is None:
-                    continue
-                if txt:
-                    new_texts[p] = txt
+            # text docs also need their stored text (missing in old indexes)
+            has_text = Path(p).suffix.lower() in text_exts
+            if p not in vec_map or (has_text and p not in span_map):
+                todo.append(Path(p))
+                continue
+            old = meta_map.get(p)
+            meta = _fingerprint(Path(p)) if old is None else _unchanged(Path(p), old)
+            if meta is None:
+                todo.append(Path(p))
+                continue
+            reuse(p, p, meta)
+
+        # renamed/moved files: same size + head hash as a vanished path
+        gone = {(m[0], m[2]): old_p for old_p, m in meta_map.items()
+                if old_p in vec_map and old_p not in current_set
+                and (old_p in span_map or Path(old_p).suffix.lower() not in text_exts)}
+        todo_meta = {}
+        for fp in todo:
+            meta = todo_meta[fp.as_posix()] = _fingerprint(fp)
+            old_p = gone.pop((meta[0], meta[2]), None) if meta else None
+            if old_p is not None:
+                reuse(fp.as_posix(), old_p, meta)
+        todo = [fp for fp in todo if todo_meta[fp.as_posix()] and fp.as_posix() not in new_meta]
+
+        # ...and embed only new/changed files, reading them ahead on a thread pool
+        for fp, vec, txt in self._embed_many(todo):
+            if vec is None:
+                continue
+            p = fp.as_posix()
+            if txt:
+                with self.lock.write():
+                    new_spans[p] = self._texts.add(txt)
             new_paths.append(p)
             new_vecs.append(vec)
+            new_meta[p] = todo_meta[p]
+
+        # drop the mapping before _persist overwrites the file (Windows
+        # refuses to replace a file that is still mapped)
+        del vec_map, old_mat
 
         # 4) Swap into memory & persist
-        with self.lock:
-            self.paths  = new_paths
-            self.matrix = (np.vstack(new_vecs)
-                           if new_vecs
-                           else np.empty((0, EMBED_DIM), dtype=np.float32))
-            self.texts  = new_texts
-            np.save(EMB_NPY_PATH, self.matrix)
-            EMB_META.write_text(json.dumps(self.paths))
+        with self.lock.write():
+            self._set_rows(new_paths, new_vecs)
+            self._spans = new_spans
+            self._meta  = new_meta
+            self._persist()
 
         print(f"[Indexer] index updated: {len(self.paths)} files")
 
 
     def _rebuild(self):
         print("[Indexer] building index…")
-        vecs, paths, texts = [], [], {}
+        vecs, paths, spans, metas = [], [], {}, {}
 
         # scan everything under self.folder
-        for fp in self.folder.rglob("*"):
-            vec, txt = self._embed_file(fp)
+        for fp, vec, txt in self._embed_many(self.folder.rglob("*")):
             if vec is None:
                 continue
 
             p = fp.as_posix()
             paths.append(p)
             vecs.append(vec)
+            meta = _fingerprint(fp)
+            if meta is not None:
+                metas[p] = meta
             if txt:
-                texts[p] = txt
+                with self.lock.write():
+                    spans[p] = self._texts.add(txt)
 
         # atomically swap in new index
-        with self.lock:
-            if vecs:
-                self.matrix = np.vstack(vecs)
-            else:
-                # no matches → empty matrix
-                self.matrix = np.empty((0, EMBED_DIM), dtype=np.float32)
-            self.paths = paths
-            self.texts = texts
-            # persist to disk
-            np.save(EMB_NPY_PATH, self.matrix)
-            EMB_META.write_text(json.dumps(self.paths))
+        with self.lock.write():
+            self._set_rows(paths, vecs)
+            self._spans = spans
+            self._meta  = metas
+            self._persist()
 
         print(f"[Indexer] built {len(self.paths)} docs")
 
@@ -152,48 +516,180 @@ class FileIndexer(FileSystemEventHandler):
         obs.daemon = True
         obs.start()
 
+    # Editors/rsync fire many events per save; collect the touched paths and
+    # process them in one batch once things have been quiet for FLUSH_DELAY.
     def on_created(self, event):
-        self._index_file(Path(event.src_path))
+        self._mark_dirty(event)
 
     def on_modified(self, event):
-        self._index_file(Path(event.src_path))
+        self._mark_dirty(event)
 
     def on_deleted(self, event):
-        p = Path(event.src_path).as_posix()
-        with self.lock:
-            if p in self.paths:
-                i = self.paths.index(p)
-                self.paths.pop(i)
-                self.matrix = np.delete(self.matrix, i, axis=0)
-                self.texts.pop(p, None)
-                np.save(EMB_NPY_PATH, self.matrix)
-                EMB_META.write_text(json.dumps(self.paths))
-
-    def _index_file(self, fp: Path):
-        vec, txt = self._embed_file(fp)
-        if vec is None:
-            return  # unsupported or empty
-
-        p = fp.as_posix()
-        with self.lock:
-            if p in self.paths:
-                # update existing
-                idx = self.paths.index(p)
-                self.matrix[idx] = vec
-                if txt:
-                    self.texts[p] = txt
-                print(f"[Indexer] updated {p}")
-            else:
-                # append new
-                self.paths.append(p)
-                self.matrix = np.vstack([self.matrix, vec])
-                if txt:
-                    self.texts[p] = txt
-                print(f"[Indexer] added   {p}")
-
-            # persist changes
-            np.save(EMB_NPY_PATH, self.matrix)
-            EMB_META.write_text(json.dumps(self.paths))
+        self._mark_dirty(event)
+
+    def _mark_dirty(self, event):
+        if event.is_directory:
+            return
+        with self._dirty_lock:
+            self._dirty.add(Path(event.src_path))
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(FLUSH_DELAY, self._flush_dirty)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush_dirty(self):
+        # a timer firing mid-flush waits here, so an older embedding can
+        # never overwrite a newer one or reach the log after it
+        with self._flush_lock:
+            with self._dirty_lock:
+                dirty, self._dirty = self._dirty, set()
+                self._flush_timer = None
+
+            # a path is re-embedded if it still exists, dropped otherwise;
+            # fingerprint before reading so a later write shows up as a change
+            present = [fp for fp in dirty if fp.is_file()]
+            gone    = [fp.as_posix() for fp in dirty if not fp.is_file()]
+            with self.lock.read():
+                olds = {fp: self._meta.get(fp.as_posix()) for fp in present}
+            # saved/touched without a content change → keep the row, just
+            # remember the new mtime so the next check skips the hash
+            touched = {}
+            for fp, old in olds.items():
+                meta = _unchanged(fp, old) if old is not None else None
+                if meta is not None:
+                    touched[fp.as_posix()] = meta
+            present = [fp for fp in present if fp.as_posix() not in touched]
+            metas   = {fp: _fingerprint(fp) for fp in present}
+            present = [fp for fp in present if metas[fp] is not None]
+            embedded = [(fp.as_posix(), vec, txt, metas[fp])
+                        for fp, vec, txt in self._embed_many(present)
+                        if vec is not None]  # unsupported or empty
+
+            with self.lock.write():
+                for p, meta in touched.items():
+                    if p in self._row:
+                        self._meta[p] = meta
+                records = []
+                for p in gone:
+                    if self._remove(p):
+                        records.append(_log_record(_OP_DEL, p))
+                for p, vec, txt, meta in embedded:
+                    self._upsert(p, vec, txt, meta)
+                    records.append(_log_record(_OP_ADD, p, vec, self._spans.get(p, _NO_SPAN), meta))
+                # persist once per batch
+                if records:
+                    self._append_log(records)
+
+    def _upsert(self, p: str, vec: np.ndarray, txt: str | None,
+                meta: tuple[int, int, str]):
+        """Add or replace the row for *p* (call with self.lock write-held)."""
+        self._meta[p] = meta
+        idx = self._row.get(p)
+        if idx is not None:
+            # update existing
+            self.matrix[idx] = vec
+            if txt:
+                self._spans[p] = self._texts.add(txt)
+            print(f"[Indexer] updated {p}")
+        else:
+            # append new (amortised O(D), no full-matrix copy)
+            self._ensure_capacity(self._size + 1)
+            self.matrix[self._size] = vec
+            self._row[p] = self._size
+            self._size += 1
+            self.paths.append(p)
+            if txt:
+                self._spans[p] = self._texts.add(txt)
+            print(f"[Indexer] added   {p}")
+
+    def _remove(self, p: str) -> bool:
+        """Drop the row for *p* if indexed (call with self.lock write-held)."""
+        i = self._row.pop(p, None)
+        if i is None:
+            return False
+        # O(D) removal: move the last row into the hole
+        last = self._size - 1
+        if i != last:
+            self.matrix[i] = self.matrix[last]
+            self.paths[i]  = self.paths[last]
+            self._row[self.paths[i]] = i
+        self.paths.pop()
+        self._size -= 1
+        self._spans.pop(p, None)
+        self._meta.pop(p, None)
+        print(f"[Indexer] removed {p}")
+        return True
+
+    # --------------- matrix storage (call with self.lock write-held) ----
+    def _ensure_capacity(self, n: int):
+        """Grow the row buffer geometrically so appends stay amortised O(D)."""
+        cap = len(self.matrix)
+        if n <= cap:
+            return
+        while cap < n:
+            cap *= 2
+        grown = _aligned_rows(cap)
+        grown[:self._size] = self.matrix[:self._size]
+        self.matrix = grown
+
+    def _set_rows(self, paths: list[str], vecs: list[np.ndarray]):
+        """Replace the whole index with *paths* and their *vecs*."""
+        self.paths = paths
+        self._row  = {p: i for i, p in enumerate(paths)}
+        cap = INITIAL_CAPACITY
+        while cap < len(vecs):
+            cap *= 2
+        matrix = _aligned_rows(cap)
+        if vecs:
+            matrix[:len(vecs)] = vecs
+        self.matrix = matrix
+        self._size  = len(vecs)
+
+    def _persist(self):
+        """Write a full snapshot (live rows + path list) and start a fresh log."""
+        # drop text of deleted/updated docs once it outweighs the live text
+        live = sum(n for _, n in self._spans.values())
+        compacted = None
+        if self._texts.size() > 2 * max(live, LOG_COMPACT_MIN):
+            compacted = self._texts.compact(self._spans)
+        spans = self._spans if compacted is None else compacted
+        idx = np.full((self._size, 2), -1, dtype=np.int64)
+        for i, p in enumerate(self.paths):
+            if p in spans:
+                idx[i] = spans[p]
+
+        np.save(EMB_NPY_PATH, self.matrix[:self._size])
+        if compacted is None:
+            np.save(TEXTS_IDX, idx)
+        entries = []
+        for p in self.paths:
+            m = self._meta.get(p)
+            entries.append({"path": p} if m is None else
+                           {"path": p, "size": m[0], "mtime_ns": m[1], "h": m[2]})
+        EMB_META.write_text(json.dumps(entries))
+        EMB_MODEL.write_text(self._model)
+        if self._log_file is not None:
+            self._log_file.close()
+        self._log_file = open(EMB_LOG, "wb")
+        self._snapshot_bytes = self._size * _VEC_BYTES
+        if compacted is not None:
+            # spans into the compacted store go last; once they are on disk
+            # _recover_compaction rolls the swap forward after a crash
+            np.save(TEXTS_IDX_NEW, idx)
+            self._texts.commit()
+            os.replace(TEXTS_IDX_NEW, TEXTS_IDX)
+            self._spans = compacted
+
+    def _append_log(self, records: list[bytes]):
+        """
+        Persist a batch of changes in O(batch) bytes instead of rewriting the
+        snapshot; compact into a new snapshot once the log outgrows it.
+        """
+        self._log_file.write(b"".join(records))
+        self._log_file.flush()
+        if self._log_file.tell() > 2 * max(self._snapshot_bytes, LOG_COMPACT_MIN):
+            self._persist()
 
 
     def _embed_file(self, fp: Path):
@@ -201,33 +697,94 @@ class FileIndexer(FileSystemEventHandler):
         Given a single file path, return (vec: np.ndarray, txt: str|None).
         If the file isn't supported or is empty, returns (None, None).
         """
+        return self._embed_read(*self._read_file(fp))
+
+    def _read_file(self, fp: Path):
+        """
+        Disk/parse stage of _embed_file (safe to run on a worker thread).
+        Returns (kind, payload, txt) with kind in {"text", "image", "audio"},
+        or (None, None, None) if the file isn't supported or is empty.
+        """
         ext = fp.suffix.lower()
-        txt = None
 
         # TEXT / MD
         if ext in {".txt", ".md"}:
-            txt = fp.read_text(errors="ignore")
+            if fp.stat().st_size == 0:
+                return None, None, None  # (mmap can't map an empty file)
+            with open(fp, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                txt = mm[:MAX_TEXT_BYTES].decode("utf-8", errors="ignore")
             if not txt.strip():
-                return None, None
-            vec = embed_text(txt)
+                return None, None, None
+            return "text", txt, txt
 
-        # PDF
+        # PDF (_embed_many parses these in self._pdf_pool instead)
         elif ext == ".pdf":
-            texts = extract_texts_from_dir(fp.parent.as_posix())
-            txt = texts.get(fp.name, "")
-            if not txt.strip():
-                return None, None
-            vec = embed_text(txt)
+            return _pdf_read(extract_text_from_pdf(fp))
 
-        # IMAGES
+        # IMAGES – decode here so the embed stage only resizes
         elif ext in {".png", ".jpg", ".jpeg", ".webp"}:
-            vec = embed_image(fp.as_posix())
+            img = Image.open(fp)
+            img.load()
+            return "image", img, None
 
         # AUDIO
         elif ext in {".wav", ".mp3", ".flac"}:
-            vec = embed_audio(fp.as_posix())
-
+            return "audio", fp.as_posix(), None
+
+        return None, None, None
+
+    def _embed_read(self, kind, payload, txt):
+        """Inference stage of _embed_file: one ORT run on the output of _read_file."""
+        if kind == "text":
+            vec = embed_text(payload)
+        elif kind == "image":
+            vec = embed_image(payload)
+        elif kind == "audio":
+            vec = embed_audio(payload)
         else:
             return None, None
+        # pin dtype/layout so rows copy straight into the float32 matrix
+        return np.ascontiguousarray(vec, dtype=np.float32), txt
 
-        return vec, txt
\ No newline at end of file
+    def _embed_many(self, files):
+        """
+        Yield (fp, vec, txt) for each path in *files*. Reading/parsing runs on
+        the indexer's read pools up to READ_AHEAD files ahead (bounding memory), while
+        embedding stays on the calling thread – ORT already parallelises each
+        run internally.
+        """
+        pending = deque()
+        for fp in files:
+            if fp.suffix.lower() == ".pdf":
+                fut = self._pdf_executor().submit(extract_text_from_pdf, fp)
+            else:
+                fut = self._read_pool.submit(self._read_file, fp)
+            pending.append((fp, fut))
+            if len(pending) >= READ_AHEAD:
+                yield self._embed_pending(*pending.popleft())
+        while pending:
+            yield self._embed_pending(*pending.popleft())
+
+    def _pdf_executor(self) -> ProcessPoolExecutor:
+        # Windows spawns the workers: each re-imports the main module (main_app
+        # builds nothing at import) and unpickles extract_text_from_pdf by name
+        if self._pdf_pool is None:
+            self._pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        return self._pdf_pool
+
+    def _embed_pending(self, fp: Path, fut):
+        # a bad file is logged and skipped; it must not abort the batch
+        # (the other adds/deletes of a flush, or the whole initial build)
+        try:
+            read = fut.result()
+        except Exception as e:
+            print(f"[Indexer] failed reading {fp}: {e}")
+            return fp, None, None
+        if isinstance(read, str):  # text from the PDF process pool
+            read = _pdf_read(read)
+        try:
+            return (fp, *self._embed_read(*read))
+        except Exception as e:
+            print(f"[Indexer] failed embedding {fp}: {e}")
+            return fp, None, None
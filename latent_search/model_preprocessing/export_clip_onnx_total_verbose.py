@@ -13,7 +13,8 @@ os.environ["HUGGINGFACE_HUB_TOKEN"] = TOKEN
 OUT = Path("onnx/clip_fp32")
 OUT.mkdir(parents=True, exist_ok=True)
 
-def export_full_clip():
+def _load_clip():
+    """CLIPModel in eval mode plus dummy export inputs (tokens, image)."""
     print("[EXPORT] Loading full CLIPModel…")
     model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32", use_auth_token=TOKEN).eval()
     tokenizer = CLIPTokenizer.from_pretrained("openai/clip-vit-base-patch32", use_auth_token=TOKEN)
@@ -27,6 +28,10 @@ def export_full_clip():
         truncation=True
     )
     dummy_img = torch.randn(1, 3, 224, 224)
+    return model, toks, dummy_img
+
+def export_full_clip():
+    model, toks, dummy_img = _load_clip()
 
     onnx_path = OUT / "clip_full.onnx"
     print(f"[EXPORT] Exporting full CLIP to {onnx_path} …")
@@ -38,7 +43,8 @@ def export_full_clip():
         onnx_path,
         input_names=["input_ids", "pixel_values", "attention_mask"],
         output_names=["text_embeds", "image_embeds"],
-        opset_version=16,
+        opset_version=17,
+        do_constant_folding=True,
         dynamic_axes={
             "input_ids":      {0: "batch"},
             "pixel_values":   {0: "batch"},
@@ -51,5 +57,79 @@ def export_full_clip():
     size_mb = onnx_path.stat().st_size / (1024*1024)
     print(f"[EXPORT] Done in {dt:.1f}s, file size {size_mb:.1f} MB")
 
+class _TextTower(torch.nn.Module):
+    def __init__(self, clip: CLIPModel):
+        super().__init__()
+        self.clip = clip
+
+    def forward(self, input_ids, attention_mask):
+        return self.clip.get_text_features(input_ids=input_ids, attention_mask=attention_mask)
+
+
+class _ImageTower(torch.nn.Module):
+    def __init__(self, clip: CLIPModel):
+        super().__init__()
+        self.clip = clip
+
+    def forward(self, pixel_values):
+        return self.clip.get_image_features(pixel_values=pixel_values)
+
+
+def export_split_clip():
+    """
+    Export the text and image towers as two graphs so a text query no longer
+    runs the ViT on a dummy image (and vice versa).
+    """
+    model, toks, dummy_img = _load_clip()
+
+    jobs = [
+        (_TextTower(model), (toks.input_ids, toks.attention_mask),
+         ["input_ids", "attention_mask"], OUT / "clip_text.onnx"),
+        (_ImageTower(model), (dummy_img,),
+         ["pixel_values"], OUT / "clip_image.onnx"),
+    ]
+    for tower, args, input_names, onnx_path in jobs:
+        print(f"[EXPORT] Exporting {onnx_path.stem} to {onnx_path} …")
+        t0 = time.time()
+        torch.onnx.export(
+            tower,
+            args,
+            onnx_path,
+            input_names=input_names,
+            output_names=["embeds"],
+            opset_version=17,
+            do_constant_folding=True,
+            dynamic_axes={name: {0: "batch"} for name in input_names + ["embeds"]},
+        )
+        dt = time.time() - t0
+        size_mb = onnx_path.stat().st_size / (1024*1024)
+        print(f"[EXPORT] Done in {dt:.1f}s, file size {size_mb:.1f} MB")
+
+def quantize_for_cpu(onnx_path: Path) -> Path:
+    """
+    Fuse attention/LayerNorm and dynamically quantize the weights to INT8
+    (VNNI on x86, NEON dot-product on ARM) for CPU-only runs. Copy the
+    `*_int8.onnx` files next to the QDQ models in latent_search/models/clip;
+    embedder.py loads them when the QNN provider is unavailable. The NPU
+    path keeps using the QDQ models compiled by quantize.sh.
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    from onnxruntime.transformers.optimizer import optimize_model
+
+    opt_path  = onnx_path.with_name(onnx_path.stem + "_opt.onnx")
+    int8_path = onnx_path.with_name(onnx_path.stem + "_int8.onnx")
+
+    print(f"[QUANT] Optimizing {onnx_path.name} …")
+    optimize_model(onnx_path.as_posix(), model_type="clip", opt_level=99).save_model_to_file(opt_path.as_posix())
+    print(f"[QUANT] Quantizing to {int8_path.name} …")
+    quantize_dynamic(opt_path, int8_path, weight_type=QuantType.QInt8)
+
+    size_mb = int8_path.stat().st_size / (1024*1024)
+    print(f"[QUANT] Done, file size {size_mb:.1f} MB")
+    return int8_path
+
 if __name__ == "__main__":
     export_full_clip()
+    export_split_clip()
+    for name in ("clip_full.onnx", "clip_text.onnx", "clip_image.onnx"):
+        quantize_for_cpu(OUT / name)
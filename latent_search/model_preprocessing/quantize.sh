@@ -8,4 +8,27 @@ qai-hub submit-compile-job \
   " \
   --input_specs     "{'input_ids': ((1, 77), 'int64'), 'pixel_values': ((1, 3, 224, 224), 'float32'), 'attention_mask': ((1, 77), 'int64')}" \
   --name            clip_full_int8_qdq \
-  --wait
\ No newline at end of file
+  --wait
+
+# Split towers (used by embedder.py when present)
+qai-hub submit-compile-job \
+  --model           onnx/clip_fp32/clip_text.onnx \
+  --device          "Snapdragon X Elite CRD" \
+  --device-os       11 \
+  --compile_options "
+        --target_runtime onnx
+  " \
+  --input_specs     "{'input_ids': ((1, 77), 'int64'), 'attention_mask': ((1, 77), 'int64')}" \
+  --name            clip_text_int8_qdq \
+  --wait
+
+qai-hub submit-compile-job \
+  --model           onnx/clip_fp32/clip_image.onnx \
+  --device          "Snapdragon X Elite CRD" \
+  --device-os       11 \
+  --compile_options "
+        --target_runtime onnx
+  " \
+  --input_specs     "{'pixel_values': ((1, 3, 224, 224), 'float32')}" \
+  --name            clip_image_int8_qdq \
+  --wait
@@ -1,30 +1,46 @@
 """
-Extract raw text from PDFs using pdfminer.six (pure-Python; works on Win ARM).
+Extract raw text from PDFs. Uses PyMuPDF when it is installed (roughly 10x
+faster per page) and falls back to pdfminer.six, which is pure Python and
+always works on Win ARM.
 Install with:
     pip install pdfminer.six
+    pip install pymupdf        # optional fast path
 """
 
 from pathlib import Path
-from pdfminer.high_level import extract_text
+from pdfminer.high_level import extract_text as _pdfminer_text
 
-# Maximum number of PDFs to process in one go
-MAX_FILES = 50
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
 
-def extract_texts_from_dir(directory: str) -> dict[str, str]:
-    """
-    Walk `directory`, find up to MAX_FILES .pdf files,
-    and return a dict mapping filename → full extracted text.
-    """
-    texts: dict[str, str] = {}
-    pdf_paths = list(Path(directory).rglob("*.pdf"))[:MAX_FILES]
+# Only raw tokens are embedded: skip ligature preservation and image blocks,
+# and join hyphenated line breaks back into whole words.
+_FITZ_FLAGS = (
+    (fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP | fitz.TEXT_DEHYPHENATE)
+    if fitz else 0
+)
 
-    for p in pdf_paths:
-        try:
-            # pdfminer handles password-free PDFs; slow but reliable
-            text = extract_text(p)
-            if text:
-                texts[p.name] = text
-        except Exception as e:
-            print(f"[extract_texts_from_dir] failed on {p}: {e}")
+def extract_text(p: Path) -> str:
+    if fitz is None:
+        return _pdfminer_text(p)
+    doc = fitz.open(p)
+    try:
+        parts = []
+        for i in range(doc.page_count):
+            page = doc.load_page(i)
+            parts.append(page.get_text("text", flags=_FITZ_FLAGS))
+            page = None   # drop the page before loading the next one
+        return "".join(parts)
+    finally:
+        doc.close()
 
-    return texts
+def extract_text_from_pdf(path: str | Path) -> str:
+    """Return the text of a single PDF ("" on failure)."""
+    p = Path(path)
+    try:
+        return extract_text(p)
+    except Exception as e:
+        print(f"[extract_text_from_pdf] failed on {p}: {e}")
+        return ""
@@ -1,33 +1,45 @@
-import itertools
+import ctypes
+import html
 import os
+import re
 import platform
 import sys
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
-import keyboard
 load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env", override=False)
 
-from PySide6.QtCore import Qt, QThread, Signal, Slot, QTimer
-from PySide6.QtGui import QGuiApplication, QPalette, QCursor
+from PySide6.QtCore import (
+    Qt, QThread, Signal, Slot, QTimer, QAbstractNativeEventFilter,
+    QAbstractListModel, QModelIndex, QRect, QSize, QObject, QRunnable, QThreadPool,
+)
+from PySide6.QtGui import (
+    QGuiApplication, QPalette, QCursor, QIcon, QPixmap, QTextCursor, QPainter, QColor,
+    QFont, QFontMetrics, QStaticText, QTextCharFormat,
+)
 from PySide6.QtWidgets import (
     QApplication,
     QDockWidget,
     QHBoxLayout,
     QLabel,
     QLineEdit,
-    QListWidget,
+    QListView,
     QMainWindow,
     QPushButton,
-    QScrollArea,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionViewItem,
     QTextEdit,
     QVBoxLayout,
     QWidget,
 )
 
 from general.dataset_setup import download_dataset_to_subfolder
-from general.groq_helpers import chat_groq, transcribe_wav, Recorder
+from general.groq_helpers import (
+    STT_PARTIAL_MODEL, stream_chat_groq, transcribe_wav_bytes, Recorder,
+)
 from latent_search.search_engine import SearchEngine
-from general.win11_theme import apply_win11_theme
+from general.win11_theme import apply_win11_theme, system_prefers_dark
 
 print(f"[DEBUG] Python {platform.python_version()} on {platform.platform()}")
 print(f"[DEBUG] FIRST 5 PATH entries → {os.environ.get('PATH', '').split(';')[:5]}")
@@ -38,49 +50,93 @@ print(f"[DEBUG] OVERLAY flag → {'--overlay' in sys.argv}")
 # ----------------------------------------------------------------------------
 SCRIPT_DIR = Path(__file__).parent.resolve()
 DEMO_FOLDER = SCRIPT_DIR / "sample_files"
-DEMO_FOLDER.mkdir(exist_ok=True)
-if not any(DEMO_FOLDER.iterdir()):
-    (DEMO_FOLDER / "readme.txt").write_text("This is a tiny demo file about apples.")
+RESULTS_K = 10  # results shown per search
+SEARCH_DEBOUNCE_MS = 250
+CLICK_DEBOUNCE_MS = 200  # Enter / Search button
+PARTIAL_STT_MS = 2500  # interval of live transcripts while recording
+
+# Built by EngineInitTask once the window is up, never at import: the
+# download and initial indexing must not block start-up, and the indexer's
+# PDF worker processes re-import this module on Windows.
+_engine: SearchEngine | None = None
+
+
+def _init_engine() -> SearchEngine:
+    DEMO_FOLDER.mkdir(exist_ok=True)
+    if not any(DEMO_FOLDER.iterdir()):
+        (DEMO_FOLDER / "readme.txt").write_text("This is a tiny demo file about apples.")
+
+    download_dataset_to_subfolder("manisha717/dataset-of-pdf-files", DEMO_FOLDER)
+
+    return SearchEngine(DEMO_FOLDER)
 
-download_dataset_to_subfolder("manisha717/dataset-of-pdf-files", DEMO_FOLDER)
 
-_engine = SearchEngine(DEMO_FOLDER)
+class _EngineSignals(QObject):
+    engine_ready = Signal(object)  # SearchEngine
+    engine_failed = Signal(str)
+
+
+class EngineInitTask(QRunnable):
+    """Download the demo corpus + build the index on a pool thread."""
+
+    def __init__(self, signals: _EngineSignals):
+        super().__init__()
+        self._signals = signals
+
+    def run(self):
+        try:
+            engine = _init_engine()
+        except Exception as e:
+            print(f"[DEBUG] engine init failed: {e}")
+            self._signals.engine_failed.emit(str(e))
+            return
+        self._signals.engine_ready.emit(engine)
 
 # ----------------------------------------------------------------------------
-# 1)  Worker thread (so the UI remains responsive)
+# 1)  Workers (so the UI remains responsive)
 # ----------------------------------------------------------------------------
-class SearchWorker(QThread):
-    results_ready = Signal(str, list)  # query, results
+class _SearchSignals(QObject):
+    results_ready = Signal(int, str, list)  # seq, query, results
+
 
-    def __init__(self, query: str):
+class SearchTask(QRunnable):
+    """One search on the app's search pool (threads are reused, not spawned)."""
+
+    def __init__(self, query: str, seq: int, latest_seq, signals: _SearchSignals):
         super().__init__()
         self._query = query
+        self._seq = seq
+        self._latest_seq = latest_seq  # () -> newest seq issued by the UI
+        self._signals = signals
 
     def run(self):
-        # Each thread gets its *own* SearchEngine → its own SQLite connection
-        results = _engine.search(self._query, k=10)
-        self.results_ready.emit(self._query, results)
+        # superseded by a newer keystroke before we got to run → skip the embed
+        if self._latest_seq() != self._seq:
+            return
+        results = _engine.search(self._query, k=RESULTS_K)
+        if self._latest_seq() != self._seq:
+            return  # superseded while searching; nobody will show these
+        self._signals.results_ready.emit(self._seq, self._query, results)
 
 
 class VoiceWorker(QThread):
     transcript_ready = Signal(str)
 
-    def __init__(self, wav_path: str):
-        super().__init__()
-        self._wav_path = wav_path
+    def __init__(self, wav_bytes: bytes, partial: bool = False, parent=None):
+        super().__init__(parent)
+        self._wav_bytes = wav_bytes
+        self._partial = partial
 
     def run(self):
         text = "Error"
         try:
-            text = transcribe_wav(self._wav_path)
+            if self._partial:
+                text = transcribe_wav_bytes(self._wav_bytes, model=STT_PARTIAL_MODEL)
+            else:
+                text = transcribe_wav_bytes(self._wav_bytes)
         except Exception as e:
+            # report through the signal; raising here would only kill the thread
             text = f"[STT error] {e}"
-            raise e
-        finally:
-            try:
-                os.remove(self._wav_path)
-            except FileNotFoundError:
-                pass
         self.transcript_ready.emit(text)
 
 
@@ -88,71 +144,231 @@ class VoiceWorker(QThread):
 # Chat LLM worker  (runs Groq call off-UI thread)
 # --------------------------------------------------------------------------
 class ChatWorker(QThread):
-    reply_ready = Signal(str)
+    token_ready = Signal(str)     # next piece of the reply, as it streams in
+    reply_complete = Signal(str)  # full reply text
 
     def __init__(self, messages: list[dict]):
         super().__init__()
-        # copy so UI can keep appending while thread runs
-        self._messages = messages.copy()
+        # immutable snapshot: the UI keeps appending to its list while we run
+        self._messages = tuple(messages)
 
     def run(self):
+        parts = []
         try:
-            reply = chat_groq(self._messages)
+            for tok in stream_chat_groq(self._messages):
+                parts.append(tok)
+                self.token_ready.emit(tok)
         except Exception as e:
-            reply = f"[Groq API error] {e}"
-        self.reply_ready.emit(reply)
+            err = f"[Groq API error] {e}"
+            parts.append(err)
+            self.token_ready.emit(err)
+        self.reply_complete.emit("".join(parts))
 
 
-class ResultCard(QWidget):
-    def __init__(self, score: float, path: str, content: str):
-        super().__init__()
-        self.path = path
-        self.content = content
+# --------------------------------------------------------------------------
+# Result icons – one pixmap per file kind, rasterised once
+# --------------------------------------------------------------------------
+_KIND_BY_SUFFIX = {
+    ".pdf": "pdf",
+    ".png": "image", ".jpg": "image", ".jpeg": "image", ".webp": "image",
+}
+_THEME_ICON = {
+    "image": "image-x-generic",
+    "pdf":   "application-pdf",
+    "text":  "text-x-generic",
+}
 
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(10, 10, 10, 10)
 
-        # Icon
-        icon_label = QLabel()
-        icon_label.setPixmap(self._get_icon_for_file(path))
-        layout.addWidget(icon_label)
+@lru_cache(maxsize=8)
+def _icon_for_kind(kind: str) -> QPixmap:
+    return QIcon.fromTheme(_THEME_ICON[kind]).pixmap(32, 32)
 
-        # Text content
-        text_layout = QVBoxLayout()
-        text_layout.setSpacing(2)
 
-        title_label = QLabel(f"<b>{Path(path).name}</b>")
-        title_label.setTextFormat(Qt.RichText)
-        text_layout.addWidget(title_label)
+def _icon_for_file(path: str) -> QPixmap:
+    return _icon_for_kind(_KIND_BY_SUFFIX.get(Path(path).suffix.lower(), "text"))
 
-        snippet_label = QLabel(self._get_snippet(content))
-        snippet_label.setWordWrap(True)
-        text_layout.addWidget(snippet_label)
 
-        layout.addLayout(text_layout, 1)
+# --------------------------------------------------------------------------
+# Win32 messages: global hot-key (RegisterHotKey → WM_HOTKEY, no keyboard
+# hook) and light/dark theme switches (WM_SETTINGCHANGE "ImmersiveColorSet")
+# --------------------------------------------------------------------------
+WM_HOTKEY    = 0x0312
+WM_SETTINGCHANGE = 0x001A
+MOD_ALT      = 0x0001
+MOD_CONTROL  = 0x0002
+MOD_NOREPEAT = 0x4000
+HOTKEY_ID    = 1
 
-        # Score
-        score_label = QLabel(f"<i>{score:.3f}</i>")
-        score_label.setTextFormat(Qt.RichText)
-        layout.addWidget(score_label)
 
-    def _get_icon_for_file(self, path: str):
-        # You would have a more robust way of getting icons,
-        # for now, we'll use a simple placeholder.
-        # You can use QIcon.fromTheme() for system icons
-        from PySide6.QtGui import QIcon
-        import mimetypes
+class _WinEventFilter(QAbstractNativeEventFilter):
+    """Calls *on_hotkey* for our hot-key and *on_theme_change* on theme switches."""
 
-        mime_type, _ = mimetypes.guess_type(path)
-        if mime_type:
-            if mime_type.startswith("image"):
-                return QIcon.fromTheme("image-x-generic").pixmap(32, 32)
-            if mime_type == "application/pdf":
-                return QIcon.fromTheme("application-pdf").pixmap(32, 32)
-        return QIcon.fromTheme("text-x-generic").pixmap(32, 32)
+    def __init__(self, on_hotkey, on_theme_change):
+        super().__init__()
+        self._on_hotkey = on_hotkey
+        self._on_theme_change = on_theme_change
+
+    def nativeEventFilter(self, event_type, message):
+        # thread messages (hwnd=NULL) arrive via the event dispatcher
+        if bytes(event_type) in (b"windows_generic_MSG", b"windows_dispatcher_MSG"):
+            from ctypes import wintypes
+            msg = wintypes.MSG.from_address(int(message))
+            if msg.message == WM_HOTKEY and msg.wParam == HOTKEY_ID:
+                self._on_hotkey()
+                return True, 0
+            if (msg.message == WM_SETTINGCHANGE and msg.lParam
+                    and ctypes.wstring_at(msg.lParam) == "ImmersiveColorSet"):
+                self._on_theme_change()  # not consumed: Qt reacts to it too
+        return False, 0
+
+
+def _dot_icon(color: str, size: int = 12) -> QIcon:
+    """Filled circle icon (used for the recording blink)."""
+    pm = QPixmap(size, size)
+    pm.fill(Qt.transparent)
+    painter = QPainter(pm)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setPen(Qt.NoPen)
+    painter.setBrush(QColor(color))
+    painter.drawEllipse(0, 0, size, size)
+    painter.end()
+    return QIcon(pm)
 
-    def _get_snippet(self, content: str, max_len=150):
-        return content[:max_len] + "..." if len(content) > max_len else content
+
+# --------------------------------------------------------------------------
+# Results list – model + painted delegate (no per-row widgets)
+# --------------------------------------------------------------------------
+def _term_pattern(query: str) -> re.Pattern | None:
+    """One case-insensitive alternation of all query terms (longest first)."""
+    terms = sorted(set(query.split()), key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+
+
+def _highlight(text: str, pat: re.Pattern | None) -> str:
+    """HTML-escaped *text* with every match of *pat* in <b>, in one pass."""
+    if pat is None:
+        return html.escape(text)
+    out, pos = [], 0
+    for m in pat.finditer(text):
+        out.append(html.escape(text[pos:m.start()]))
+        out.append(f"<b>{html.escape(m.group(0))}</b>")
+        pos = m.end()
+    out.append(html.escape(text[pos:]))
+    return "".join(out)
+
+
+class ResultModel(QAbstractListModel):
+    ScoreRole = Qt.UserRole + 1
+    PathRole = Qt.UserRole + 2
+    SnippetRole = Qt.UserRole + 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # score, path, name, snippet, highlighted snippet (rich text)
+        self._rows: list[tuple[float, str, str, str, str]] = []
+        # row → (width, snippet laid out at that width); data() would hand
+        # the delegate a copy, so the laid-out texts live here
+        self._static: dict[int, tuple[int, QStaticText]] = {}
+
+    def reset(self, results: list, query: str = ""):
+        """Replace all rows with *results* ((score, path, snippet) triples)."""
+        pat = _term_pattern(query)
+        rows = []
+        for score, path, snippet in results:
+            rows.append((score, path, Path(path).name, snippet, _highlight(snippet, pat)))
+        # rows are built first, so views see one swap and one relayout
+        self.beginResetModel()
+        self._rows = rows
+        self._static.clear()
+        self.endResetModel()
+
+    def static_text(self, row: int, width: int) -> QStaticText:
+        """Highlighted snippet of *row* wrapped to *width*; re-laid out only when the width changes."""
+        cached = self._static.get(row)
+        if cached is not None and cached[0] == width:
+            return cached[1]
+        st = QStaticText(self._rows[row][4])
+        st.setTextFormat(Qt.RichText)
+        st.setTextWidth(width)
+        self._static[row] = (width, st)
+        return st
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        score, path, name, snippet, _ = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == Qt.DecorationRole:
+            return _icon_for_file(path)
+        if role == self.ScoreRole:
+            return score
+        if role == self.PathRole:
+            return path
+        if role == self.SnippetRole:
+            return snippet
+        return None
+
+
+class ResultDelegate(QStyledItemDelegate):
+    """Paints a result card: icon, bold name, snippet, score on the right."""
+    PAD = 10
+    ICON = 32
+
+    def paint(self, painter, option, index):
+        painter.save()
+        # background / hover / selection from the style, without its text
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        opt.text = ""
+        opt.icon = QIcon()
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, opt, painter, option.widget)
+
+        pad, icon = self.PAD, self.ICON
+        r = option.rect.adjusted(pad, pad, -pad, -pad)
+        fm = option.fontMetrics
+        selected = option.state & QStyle.State_Selected
+        painter.setPen(option.palette.color(
+            QPalette.HighlightedText if selected else QPalette.Text))
+
+        painter.drawPixmap(r.x(), r.y() + (r.height() - icon) // 2,
+                           index.data(Qt.DecorationRole))
+
+        score_text = f"{index.data(ResultModel.ScoreRole):.3f}"
+        score_w = fm.horizontalAdvance(score_text) + pad
+        text_x = r.x() + icon + pad
+        text_w = r.width() - icon - pad - score_w
+
+        italic = QFont(option.font)
+        italic.setItalic(True)
+        painter.setFont(italic)
+        painter.drawText(QRect(r.right() - score_w, r.y(), score_w, r.height()),
+                         Qt.AlignRight | Qt.AlignVCenter, score_text)
+
+        bold = QFont(option.font)
+        bold.setBold(True)
+        painter.setFont(bold)
+        name = QFontMetrics(bold).elidedText(index.data(Qt.DisplayRole), Qt.ElideRight, text_w)
+        painter.drawText(QRect(text_x, r.y(), text_w, fm.height()),
+                         Qt.AlignLeft | Qt.AlignVCenter, name)
+
+        # the model keeps one laid-out static text per width; re-wrap only on resize
+        painter.setFont(option.font)
+        snippet = index.model().static_text(index.row(), text_w)
+        top = r.y() + fm.height() + 2
+        painter.setClipRect(QRect(text_x, top, text_w, r.bottom() - top))
+        painter.drawStaticText(text_x, top, snippet)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        # name line + two snippet lines (longer snippets are clipped)
+        return QSize(option.rect.width(), option.fontMetrics.height() * 3 + 2 * self.PAD + 2)
 
 
 class SearchApp(QMainWindow):
@@ -160,7 +376,9 @@ class SearchApp(QMainWindow):
 
     def __init__(self, *, overlay: bool = False):
         super().__init__()
-        apply_win11_theme(self, palette="auto", acrylic=True)
+        # read once; WM_SETTINGCHANGE re-reads it (see _on_theme_change)
+        self._is_dark = system_prefers_dark()
+        apply_win11_theme(self, palette="dark" if self._is_dark else "light", acrylic=True)
 
         self._overlay_mode = overlay
 
@@ -168,6 +386,9 @@ class SearchApp(QMainWindow):
             self.resize(1200, 800)
 
         self.setWindowTitle("Latent Space Search")
+        # rasterise the result icons now instead of on the first search
+        for kind in _THEME_ICON:
+            _icon_for_kind(kind)
         self._setup_ui()
         self._setup_chatbot_dock()
 
@@ -176,27 +397,42 @@ class SearchApp(QMainWindow):
             self._configure_overlay()
         if platform.system() == "Windows":
             self.hotkeyFired.connect(self._toggle_overlay)
-            # ── GLOBAL HOTKEY via `keyboard` ────────────────────────────────────
-            try:
-                keyboard.add_hotkey(
-                    'ctrl+alt+x',
-                    lambda: self.hotkeyFired.emit(),
-                    suppress=True,
-                )
-                print("[DEBUG] keyboard hotkey registered → Ctrl+Alt+X")
-            except Exception as e:
-                print(f"[DEBUG] keyboard.hotkey failed: {e}")
+            # ── GLOBAL HOTKEY via RegisterHotKey ────────────────────────────────
+            # bound to the GUI thread (hwnd=NULL), not to a window: the overlay
+            # re-creates its native window whenever its flags change
+            self._win_filter = _WinEventFilter(self.hotkeyFired.emit, self._on_theme_change)
+            QApplication.instance().installNativeEventFilter(self._win_filter)
+            if ctypes.windll.user32.RegisterHotKey(
+                None, HOTKEY_ID, MOD_CONTROL | MOD_ALT | MOD_NOREPEAT, ord("X")
+            ):
+                print("[DEBUG] hotkey registered → Ctrl+Alt+X")
+            else:
+                print(f"[DEBUG] RegisterHotKey failed: {ctypes.GetLastError()}")
 
         self._recorder = Recorder()
         self._blink_timer = QTimer(self)
         self._blink_timer.timeout.connect(self._toggle_mic_icon)
-        self._mic_state_cycle = itertools.cycle(["Rec 🔴", "Rec 🎤"])
+        # two preloaded frames; blinking swaps the icon, the text stays fixed
+        self._mic_icons = [_dot_icon("#e81123"), _dot_icon("#8a8a8a")]
+        self._blink_parity = 0
         self._recording = False
+        # live transcripts while recording, fed into the search box
+        self._partial_timer = QTimer(self)
+        self._partial_timer.timeout.connect(self._transcribe_partial)
+        self._partial_worker: VoiceWorker | None = None
 
         self._chat_history_messages = [
             {"role": "system", "content": "You are a helpful desktop-search assistant."}
         ]
 
+        # download + index in the background; searches wait for engine_ready
+        self._show_status("Indexing…")
+        self._engine_signals = _EngineSignals(self)
+        self._engine_signals.engine_ready.connect(self._on_engine_ready)
+        self._engine_signals.engine_failed.connect(
+            lambda err: self._show_status(f"Indexing failed: {err}"))
+        QThreadPool.globalInstance().start(EngineInitTask(self._engine_signals))
+
     # ------------------- UI helpers ----------------------------------------
     def _setup_ui(self):
         # Central Widget
@@ -210,13 +446,26 @@ class SearchApp(QMainWindow):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Enter your search query…")
         self.search_input.textChanged.connect(self._debounced_search)
+        self.search_input.returnPressed.connect(self._debounced_refresh)
 
         self._search_timer = QTimer(self)
         self._search_timer.setSingleShot(True)
         self._search_timer.timeout.connect(self._perform_search)
+        # Enter/button bursts collapse into one forced search
+        self._pending_timer = QTimer(self)
+        self._pending_timer.setSingleShot(True)
+        self._pending_timer.timeout.connect(self._refresh_search)
+        self._query_seq = 0
+        # persistent search threads; results come back on the GUI thread
+        self._search_pool = QThreadPool(self)
+        self._search_pool.setMaxThreadCount(2)
+        self._search_signals = _SearchSignals(self)
+        self._search_signals.results_ready.connect(self._display_results)
+        # query of the newest search issued (its results are shown or pending)
+        self._last_query = ""
 
         search_btn = QPushButton("Search")
-        search_btn.clicked.connect(self._perform_search)
+        search_btn.clicked.connect(self._debounced_refresh)
 
         self.mic_btn = QPushButton("Voice 🎤")
         self.mic_btn.setToolTip("Click to start/stop recording")
@@ -228,13 +477,18 @@ class SearchApp(QMainWindow):
         main_layout.addLayout(search_layout)
 
         # Search Results Display
-        self.results_area = QScrollArea()
-        self.results_area.setWidgetResizable(True)
-        self.results_widget = QWidget()
-        self.results_layout = QVBoxLayout(self.results_widget)
-        self.results_area.setWidget(self.results_widget)
+        self._status_label = QLabel()
+        self._status_label.hide()
+        main_layout.addWidget(self._status_label)
 
-        main_layout.addWidget(self.results_area)
+        self._results_model = ResultModel(self)
+        self.results_view = QListView()
+        self.results_view.setModel(self._results_model)
+        self.results_view.setItemDelegate(ResultDelegate(self.results_view))
+        self.results_view.setUniformItemSizes(True)
+        self.results_view.setVerticalScrollMode(QListView.ScrollPerPixel)
+
+        main_layout.addWidget(self.results_view)
 
         # Chatbot Toggle Button
         self.chat_button = QPushButton("Toggle Chatbot")
@@ -254,6 +508,12 @@ class SearchApp(QMainWindow):
 
         self.chat_history = QTextEdit()
         self.chat_history.setReadOnly(True)
+        # writes go through one end-of-document cursor (no HTML parsing,
+        # independent of the user's selection)
+        self._chat_cursor = QTextCursor(self.chat_history.document())
+        self._chat_label_fmt = QTextCharFormat()
+        self._chat_label_fmt.setFontWeight(QFont.Bold)
+        self._chat_text_fmt = QTextCharFormat()
         chatbot_layout.addWidget(self.chat_history)
 
         chat_input_layout = QHBoxLayout()
@@ -271,74 +531,133 @@ class SearchApp(QMainWindow):
 
     @Slot()
     def _debounced_search(self):
-        self._search_timer.start(100)
+        self._search_timer.start(SEARCH_DEBOUNCE_MS)
+
+    @Slot()
+    def _debounced_refresh(self):
+        self._pending_timer.start(CLICK_DEBOUNCE_MS)
 
     # ------------------- Slots ---------------------------------------------
+    @Slot()
+    def _refresh_search(self):
+        # explicit Enter/click: re-run even an unchanged query (the index may have changed)
+        self._search_timer.stop()
+        self._last_query = ""
+        self._perform_search()
+
     @Slot()
     def _perform_search(self):
+        if _engine is None:
+            return  # still "Indexing…"; _on_engine_ready re-runs the query
         query = self.search_input.text().strip()
         if not query:
             self._clear_results()
             return
+        # e.g. a trailing space, or Enter after the debounce already ran
+        if query == self._last_query:
+            return
 
         # Don't show "Searching..." if results are already displayed
-        if self.results_layout.count() == 0:
-            self._clear_results()
-            self.results_layout.addWidget(QLabel("Searching…"))
-
-        self.worker = SearchWorker(query)
-        self.worker.results_ready.connect(self._display_results)
-        self.worker.start()
+        if self._results_model.rowCount() == 0:
+            self._show_status("Searching…")
+
+        # only the newest search may show results; an older one still
+        # queued sees the newer seq and skips its embedding
+        self._query_seq += 1
+        self._last_query = query
+        self._search_pool.start(SearchTask(
+            query, self._query_seq, lambda: self._query_seq, self._search_signals))
+
+    @Slot(object)
+    def _on_engine_ready(self, engine: SearchEngine):
+        global _engine
+        _engine = engine
+        self._clear_results()
+        if self.search_input.text().strip():
+            self._perform_search()
 
     def _clear_results(self):
-        while self.results_layout.count():
-            child = self.results_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-
-    @Slot(str, list)
-    def _display_results(self, query: str, results: list):
-        # If the query has changed since the search was started, ignore these results
-        if query != self.search_input.text().strip():
-            return
+        self._status_label.hide()
+        self._results_model.reset([])
+        # nothing shown any more, so the next search must not be skipped
+        self._last_query = ""
 
+    def _show_status(self, text: str):
         self._clear_results()
-        if not results:
-            self.results_layout.addWidget(QLabel("No results."))
-            return
+        self._status_label.setText(text)
+        self._status_label.show()
 
-        for score, path, content in results:
-            card = ResultCard(score, path, content)
-            self.results_layout.addWidget(card)
+    @Slot(int, str, list)
+    def _display_results(self, seq: int, query: str, results: list):
+        # If a newer search was started, or the query has changed since, ignore these results
+        if seq != self._query_seq or query != self.search_input.text().strip():
+            return
 
-        self.results_layout.addStretch()  # Pushes cards to the top
+        if not results:
+            self._show_status("No results.")
+        else:
+            self._status_label.hide()
+            self._results_model.reset(results, query)
 
     @Slot()
     def _toggle_recording(self):
         if not self._recording:  # start
-            self.results_display.clear()
-            self.results_display.addItem("🔴 Recording… click again to stop")
+            self._show_status("🔴 Recording… click again to stop")
             self._recorder.start()
+            self.mic_btn.setText("Rec")
+            self._blink_parity = 0
+            self._toggle_mic_icon()
             self._blink_timer.start(500)  # blink twice per second
+            self._partial_timer.start(PARTIAL_STT_MS)
             self._recording = True
         else:  # stop + transcribe
-            wav_path = self._recorder.stop_and_save()
+            self._partial_timer.stop()
+            wav_bytes = self._recorder.stop_and_bytes()
             self._blink_timer.stop()
+            self.mic_btn.setIcon(QIcon())
             self.mic_btn.setText("Voice 🎤")
             self._recording = False
 
-            self.voice_worker = VoiceWorker(wav_path)
+            self.voice_worker = VoiceWorker(wav_bytes)
             self.voice_worker.transcript_ready.connect(self._voice_to_search)
             self.voice_worker.start()
 
+    @Slot()
+    def _transcribe_partial(self):
+        # one partial in flight at a time; the next tick picks up the rest
+        if self._partial_worker is not None:
+            return
+        wav_bytes = self._recorder.snapshot()
+        if wav_bytes is None:
+            return
+        worker = VoiceWorker(wav_bytes, partial=True, parent=self)
+        worker.transcript_ready.connect(self._partial_to_search)
+        worker.finished.connect(self._partial_finished)
+        self._partial_worker = worker
+        worker.start()
+
+    @Slot()
+    def _partial_finished(self):
+        # forget the wrapper before the C++ object goes away
+        worker, self._partial_worker = self._partial_worker, None
+        if worker is not None:
+            worker.deleteLater()
+
+    @Slot(str)
+    def _partial_to_search(self, text: str):
+        # late partials must not overwrite the final transcript
+        if not self._recording or text.startswith("[STT error]"):
+            return
+        self.search_input.setText(text)  # textChanged → _debounced_search
+
     def _toggle_mic_icon(self):
-        self.mic_btn.setText(next(self._mic_state_cycle))
+        self.mic_btn.setIcon(self._mic_icons[self._blink_parity])
+        self._blink_parity ^= 1
 
     @Slot(str)
     def _voice_to_search(self, text: str):
-        self.results_display.clear()
         if text.startswith("[STT error]"):
-            self.results_display.addItem(text)
+            self._show_status(text)
             return
         self.search_input.setText(text)
         self._perform_search()
@@ -354,20 +673,42 @@ class SearchApp(QMainWindow):
             return
 
         # Update GUI immediately
-        self.chat_history.append(f"You: {user_msg}")
+        self._chat_write_turn("You", user_msg)
         self.chat_input.clear()
 
         # Track convo for the LLM
         self._chat_history_messages.append({"role": "user", "content": user_msg})
 
-        # Kick off background Groq request
+        # Kick off background Groq request; the reply streams in token by token
+        self._chat_write_turn("Assistant")
         self.chat_worker = ChatWorker(self._chat_history_messages)
-        self.chat_worker.reply_ready.connect(self._display_chat_reply)
+        self.chat_worker.token_ready.connect(self._display_chat_token)
+        self.chat_worker.reply_complete.connect(self._finish_chat_reply)
         self.chat_worker.start()
 
+    def _chat_write_turn(self, who: str, text: str = ""):
+        """Start a new paragraph "<b>who:</b> text" at the end of the chat."""
+        cur = self._chat_cursor
+        cur.movePosition(QTextCursor.End)
+        if not self.chat_history.document().isEmpty():
+            cur.insertBlock()
+        cur.insertText(f"{who}: ", self._chat_label_fmt)
+        cur.insertText(text, self._chat_text_fmt)
+        self._chat_scroll_to_end()
+
     @Slot(str)
-    def _display_chat_reply(self, reply: str):
-        self.chat_history.append(f"Assistant: {reply}")
+    def _display_chat_token(self, tok: str):
+        # extend the current paragraph without append()'s paragraph break
+        self._chat_cursor.movePosition(QTextCursor.End)
+        self._chat_cursor.insertText(tok, self._chat_text_fmt)
+        self._chat_scroll_to_end()
+
+    def _chat_scroll_to_end(self):
+        bar = self.chat_history.verticalScrollBar()
+        bar.setValue(bar.maximum())
+
+    @Slot(str)
+    def _finish_chat_reply(self, reply: str):
         # Persist assistant turn for future context
         self._chat_history_messages.append({"role": "assistant", "content": reply})
 
@@ -390,22 +731,13 @@ class SearchApp(QMainWindow):
         y = geo.y() + geo.height() - bar_h - h - 8
         self.setGeometry(x, y, w, h)
 
-    # ---------- NEW: theme helper (run once) ----------------------
-    def _apply_system_theme(self):
-        # crude check: Windows dark mode registry value (0 = dark)
-        import winreg
-        try:
-            with winreg.OpenKey(winreg.HKEY_CURRENT_USER,
-                                r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize") as k:
-                v, _ = winreg.QueryValueEx(k, "AppsUseLightTheme")
-            if v == 0:
-                QApplication.setStyle("Fusion")
-                dark = QApplication.palette()
-                dark.setColor(QPalette.Window, Qt.black)
-                dark.setColor(QPalette.WindowText, Qt.white)
-                QApplication.setPalette(dark)
-        except OSError:
-            pass  # fallback: leave default
+    def _on_theme_change(self):
+        # sent to every top-level window; only re-theme on an actual switch
+        system_prefers_dark.cache_clear()
+        is_dark = system_prefers_dark()
+        if is_dark != self._is_dark:
+            self._is_dark = is_dark
+            apply_win11_theme(self, palette="dark" if is_dark else "light", acrylic=True)
 
     def _animate_visibility(self, show: bool):
         """Instantly show or hide – no fade (debug mode)."""
@@ -426,6 +758,8 @@ class SearchApp(QMainWindow):
             self._animate_visibility(True)
 
     def closeEvent(self, ev):
+        if platform.system() == "Windows":
+            ctypes.windll.user32.UnregisterHotKey(None, HOTKEY_ID)
         super().closeEvent(ev)
 
 